@@ -3,9 +3,13 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+import atexit
+import copy
 import logging
 import logging.config
+import logging.handlers
 import pathlib
+import queue
 import sys
 
 import click
@@ -21,22 +25,29 @@ __all__ = ["cli", "create"]
 _timestamper = structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S")
 
 
+# Keys added by datalad to its log records
+_DATALAD_KEYS = frozenset(
+    {
+        "message",
+        "dlm_progress",
+        "dlm_progress_noninteractive_level",
+        "dlm_progress_update",
+        "dlm_progress_label",
+        "dlm_progress_unit",
+        "dlm_progress_total",
+    }
+)
+
+
 def _remove_datalad_message(_, __, event_dict):
     """Clean datalad records."""
-    if "message" in event_dict:
-        event_dict.pop("message")
-    if "dlm_progress" in event_dict:
-        event_dict.pop("dlm_progress")
-    if "dlm_progress_noninteractive_level" in event_dict:
-        event_dict.pop("dlm_progress_noninteractive_level")
-    if "dlm_progress_update" in event_dict:
-        event_dict.pop("dlm_progress_update")
-    if "dlm_progress_label" in event_dict:
-        event_dict.pop("dlm_progress_label")
-    if "dlm_progress_unit" in event_dict:
-        event_dict.pop("dlm_progress_unit")
-    if "dlm_progress_total" in event_dict:
-        event_dict.pop("dlm_progress_total")
+    # datalad sets "dlm_progress" on every progress record and "message"
+    # is only present on records formatted by another handler; anything
+    # else is passed through as-is
+    if "message" not in event_dict and "dlm_progress" not in event_dict:
+        return event_dict
+    for key in _DATALAD_KEYS & event_dict.keys():
+        del event_dict[key]
     return event_dict
 
 
@@ -48,6 +59,32 @@ _pre_chain = [
     _remove_datalad_message,
 ]
 
+# Root logger handler enqueueing records
+_log_handler = None
+# Listener thread owning the buffered console handler
+_log_listener = None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records unformatted for the listener to format."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Copy the record, keeping its message, args and exc_info."""
+        return copy.copy(record)
+
+
+def _stop_log_listener() -> None:
+    """Detach the queue handler, then stop the listener and flush records."""
+    global _log_handler, _log_listener
+    if _log_handler is not None:
+        logging.getLogger().removeHandler(_log_handler)
+        _log_handler = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.flush()
+        _log_listener = None
+
 
 def _set_log_config(verbose: int) -> None:
     """Set logging config.
@@ -58,6 +95,7 @@ def _set_log_config(verbose: int) -> None:
         Verbosity.
 
     """
+    global _log_handler, _log_listener
     # Configure logger based on verbosity
     if verbose == 0:
         level = logging.WARNING
@@ -65,40 +103,52 @@ def _set_log_config(verbose: int) -> None:
         level = logging.INFO
     else:
         level = logging.DEBUG
+    # Stop previous listener if reconfiguring
+    _stop_log_listener()
     # Configure stdlib
     logging.config.dictConfig(
         {
             "version": 1,
             "disable_existing_loggers": False,
-            "formatters": {
-                "console": {
-                    "()": structlog.stdlib.ProcessorFormatter,
-                    "processors": [
-                        structlog.stdlib.add_logger_name,
-                        structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-                        structlog.dev.ConsoleRenderer(
-                            colors=sys.stdout.isatty() and sys.stderr.isatty()
-                        ),
-                    ],
-                    "foreign_pre_chain": _pre_chain,
-                },
-            },
-            "handlers": {
-                "default": {
-                    "level": level,
-                    "class": "logging.StreamHandler",
-                    "formatter": "console",
-                },
-            },
             "loggers": {
                 "": {
-                    "handlers": ["default"],
+                    "handlers": [],
                     "level": level,
                     "propagate": True,
                 },
             },
         }
     )
+    # Format and emit records on a separate thread so that logging calls
+    # only enqueue
+    handler = logging.StreamHandler()
+    handler.setLevel(level)
+    handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            processors=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.dev.ConsoleRenderer(
+                    colors=sys.stdout.isatty() and sys.stderr.isatty()
+                ),
+            ],
+            foreign_pre_chain=_pre_chain,
+        )
+    )
+    # Batch writes to stderr, flushing immediately on warnings and errors
+    buffer = logging.handlers.MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.WARNING,
+        target=handler,
+    )
+    buffer.setLevel(level)
+    log_queue = queue.Queue(-1)
+    _log_handler = _QueueHandler(log_queue)
+    logging.getLogger().addHandler(_log_handler)
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, buffer, respect_handler_level=True
+    )
+    _log_listener.start()
     # Configure structlog
     structlog.configure(
         processors=[
@@ -120,6 +170,9 @@ def _set_log_config(verbose: int) -> None:
     datalad.log.lgr.setLevel(level)
 
 
+atexit.register(_stop_log_listener)
+
+
 @click.group
 @click.version_option(prog_name="julio")
 @click.help_option()
@@ -149,6 +202,8 @@ def create(
     try:
         cli_func.create(registry_path)
     except RuntimeError as err:
+        _stop_log_listener()
         click.echo(f"{err}", err=True)
     else:
+        _stop_log_listener()
         click.echo("Success")
@@ -0,0 +1,125 @@
+"""Test for CLI."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import logging
+
+import pytest
+import structlog
+
+from julio import _cli
+from julio._cli import (
+    _QueueHandler,
+    _remove_datalad_message,
+    _set_log_config,
+    _stop_log_listener,
+)
+
+
+@pytest.fixture
+def reset_logging():
+    """Stop the log listener and reset structlog after the test."""
+    yield
+    _stop_log_listener()
+    structlog.reset_defaults()
+
+
+@pytest.mark.parametrize(
+    "event_dict, expected",
+    [
+        (
+            {
+                "event": "Cloning",
+                "message": "Cloning",
+                "dlm_progress": "id",
+                "dlm_progress_update": 3,
+                "dlm_progress_total": 10,
+            },
+            {"event": "Cloning"},
+        ),
+        (
+            {"event": "Created", "message": "Created"},
+            {"event": "Created"},
+        ),
+        (
+            {"event": "Created", "path": "/tmp"},
+            {"event": "Created", "path": "/tmp"},
+        ),
+        (
+            {"event": "Progress", "dlm_progress_update": 3},
+            {"event": "Progress", "dlm_progress_update": 3},
+        ),
+    ],
+)
+def test_remove_datalad_message(event_dict: dict, expected: dict) -> None:
+    """Test datalad record cleaning.
+
+    Parameters
+    ----------
+    event_dict : dict
+        The parametrized event dict.
+    expected : dict
+        The parametrized expected event dict.
+
+    """
+    assert _remove_datalad_message(None, None, event_dict) == expected
+
+
+@pytest.mark.usefixtures("reset_logging")
+def test_set_log_config(capsys: pytest.CaptureFixture) -> None:
+    """Test logging through the queue listener.
+
+    Parameters
+    ----------
+    capsys : pytest.CaptureFixture
+        Pytest fixture to capture stdout and stderr.
+
+    """
+    _set_log_config(1)
+    structlog.get_logger("julio").info("structlog event")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger("foo").exception("stdlib boom")
+    _stop_log_listener()
+    err = capsys.readouterr().err
+    assert "structlog event" in err
+    # Traceback is rendered on its own lines, not in the event text
+    (event_line,) = [
+        line for line in err.splitlines() if "stdlib boom" in line
+    ]
+    assert "ZeroDivisionError" not in event_line
+    assert "ZeroDivisionError: division by zero" in err
+    assert not any(
+        isinstance(h, _QueueHandler) for h in logging.getLogger().handlers
+    )
+
+
+@pytest.mark.usefixtures("reset_logging")
+def test_remove_datalad_message_early_return(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test stdlib records skip datalad record cleaning.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        Pytest fixture to patch objects.
+
+    """
+    has_datalad_keys = []
+
+    def _spy(logger, method_name, event_dict):
+        has_datalad_keys.append(
+            "message" in event_dict or "dlm_progress" in event_dict
+        )
+        return _remove_datalad_message(logger, method_name, event_dict)
+
+    monkeypatch.setattr(_cli, "_pre_chain", [*_cli._pre_chain[:-1], _spy])
+    _set_log_config(2)
+    for i in range(5):
+        logging.getLogger("foo").debug("stdlib event %d", i)
+    _stop_log_listener()
+    assert len(has_datalad_keys) == 5
+    assert not any(has_datalad_keys)